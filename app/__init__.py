@@ -17,7 +17,8 @@ from flask.ext.sqlalchemy import SQLAlchemy
 from flask.ext.cache import Cache
 
 
-cache = Cache(config={'CACHE_TYPE': 'simple'})
+# backend (simple/redis/filesystem) comes from the [CACHE] config section
+cache = Cache()
 db = SQLAlchemy()
 
 from .routing import osrm
@@ -28,10 +29,26 @@ category_service = None
 from flask import Flask, Blueprint
 
 
+def _build_client_config():
+    """ Parses the [CLIENT] section into the dict served by /config.
+        config.ini never changes at runtime, so this happens once per app instead of per request.
+    """
+    client_config = {k.upper(): v for k, v in config.config_ini.items('CLIENT')}
+    default_category_ids, weights = zip(*[c.strip().split(':') for c in client_config['CATEGORIES'].split(',')])
+    client_config['CATEGORIES'] = default_category_ids
+    client_config['WEIGHTS'] = map(int, weights)
+
+    for k in ('HOURS', 'MINUTES', 'STAY_TIME'):
+        client_config[k] = int(client_config[k])
+
+    return client_config
+
+
 def create_app(config_name):
     eff_config = config.config[config_name]
     app = Flask(__name__, static_folder=eff_config.APP_STATIC_FOLDER, static_url_path='')
     app.config.from_object(eff_config)
+    app.config['APP_CLIENT_CONFIG'] = _build_client_config()
     eff_config.init_app(app)
     cache.init_app(app)
     db.init_app(app)
@@ -6,11 +6,11 @@ HTTP endpoints for the web application
 import os
 import sys
 
-from flask import jsonify
+from flask import current_app
 
 from app import cache, basedir
 from app import pois
-from config import config_ini
+from app.utils.serialization import jsonify_compact
 
 from . import main
 
@@ -27,15 +27,10 @@ def get_categories():
         e.g. available categories from providers as well as initially preselected categories from application config
     """
     categories = pois.get_categories()
-    config = {k.upper(): v for k, v in config_ini.items('CLIENT')}
-    default_category_ids, weights = zip(*[c.strip().split(':') for c in config['CATEGORIES'].split(',')])
-    config['CATEGORIES'] = default_category_ids
-    config['WEIGHTS'] = map(int, weights)
+    # parsed once in create_app, config.ini never changes at runtime
+    config = current_app.config['APP_CLIENT_CONFIG']
 
-    for k in ('HOURS', 'MINUTES', 'STAY_TIME'):
-        config[k] = int(config[k])
-
-    return jsonify({
+    return jsonify_compact({
         'config': config,
         'categories':
         [{
@@ -43,3 +38,13 @@ def get_categories():
             'display_name': c.display_name,
             'description': c.description,
         } for c in categories]})
+
+
+# key by the mtimes of the files the response is built from, so editing
+# config.ini or the provider config invalidates the entry automatically
+# (important with a shared/persistent cache backend, e.g. filesystem or redis)
+def make_config_cache_key():
+    mtimes = [os.path.getmtime(os.path.join(basedir, name)) for name in ('config.ini', 'providers_config.yaml')]
+    return 'client_config_{}_{}'.format(*mtimes)
+
+get_categories.make_cache_key = make_config_cache_key
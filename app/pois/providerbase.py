@@ -8,7 +8,9 @@ import itertools
 import operator
 import os
 import sys
+from multiprocessing.pool import ThreadPool
 
+import flask
 import shapely.geometry
 import yaml
 
@@ -35,6 +37,10 @@ class Category(object):
     :type description: str
     """
 
+    # providers materialize one instance per (expanded) category; slots keep
+    # them at a fixed handful of references instead of a per-instance __dict__
+    __slots__ = ('belongs_to', 'id', 'name', 'display_name', 'description')
+
     def __init__(self, belongs_to, id, name, display_name, description):
         self.belongs_to = belongs_to
         self.id = id
@@ -97,19 +103,43 @@ class PoiLookupService(object):
         self.providers = {}
         self.categories = {}
 
+    @classmethod
+    def from_parsed(cls, config):
+        """ Creates a service from an already parsed provider configuration,
+            skipping the YAML read entirely (e.g. shared across tests)
+
+        :param config: Parsed provider configuration
+        :type config: dict
+        :rtype: PoiLookupService
+        """
+        service = cls()
+        service.config = config
+        return service
+
     def set_config_path(self, yaml_path):
         if not yaml_path:
             root_dir = os.path.realpath(os.path.dirname(sys.argv[0]))
             yaml_path = os.path.join(root_dir, 'providers_config.yaml')
 
         self.yaml_path = yaml_path
+        self.config = None
+
+    def _load_config(self):
+        """ Parses (and caches) the provider configuration YAML file
+        :rtype: dict
+        """
+        if self.config is None:
+            with open(self.yaml_path, 'r') as f:
+                # libyaml based loader where available, ~10x faster parse
+                self.config = yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
+        return self.config
 
     def _init_providers(self):
         """ Instantiate providers with the corresponding configurations from the YAML file
         """
         if not self.providers:
-            with open(self.yaml_path, 'r') as f:
-                config = yaml.load(f)
+            config = self._load_config()
 
             for provider_class in PoiProvider.__metaclass__.get_providers():
                 self.providers[provider_class.__name__] = provider_class(config.get(provider_class.__name__))
@@ -157,9 +187,31 @@ class PoiLookupService(object):
         :type speed_km_h: float
 
         """
+        groups = [(provider, list(group)) for provider, group in itertools.groupby(categories, operator.attrgetter('belongs_to'))]
+
+        # one provider does HTTP, another does a DB query - those are independent,
+        # so fetching them concurrently collapses the wall time to the slowest one
+        if len(groups) > 1 and flask.has_app_context():
+            app = flask.current_app._get_current_object()
+
+            def fetch(provider_group):
+                provider, group = provider_group
+                # worker threads need their own app context for current_app/db
+                with app.app_context():
+                    return provider.get_points_for_categories(group, start, end, time_s, radius_m, speed_km_h)
+
+            pool = ThreadPool(len(groups))
+            try:
+                results = pool.map(fetch, groups)
+            finally:
+                pool.close()
+        else:
+            results = [provider.get_points_for_categories(group, start, end, time_s, radius_m, speed_km_h)
+                       for provider, group in groups]
+
         points = []
-        for provider, group in itertools.groupby(categories, operator.attrgetter('belongs_to')):
-            points += provider.get_points_for_categories(list(group), start, end, time_s, radius_m, speed_km_h)
+        for result in results:
+            points += result
         return points
 
 
@@ -216,6 +268,24 @@ class PoiProvider(object):
         :param time_s: Desired travel time in seconds
         :param time_s: int
         """
+        # category lookups are independent I/O (DB query or HTTP call), so
+        # fetch them concurrently like the service does per provider group;
+        # providers that can batch smarter override this method anyway
+        if len(categories) > 1 and flask.has_app_context():
+            app = flask.current_app._get_current_object()
+
+            def fetch(category):
+                # worker threads need their own app context for current_app/db
+                with app.app_context():
+                    return self.get_points_for_category(category, start, end, time_s, radius_m, speed_km_h)
+
+            pool = ThreadPool(min(len(categories), 8))
+            try:
+                results = pool.map(fetch, categories)
+            finally:
+                pool.close()
+            return [p for result in results for p in result]
+
         return [p for c in categories for p in self.get_points_for_category(c, start, end, time_s, radius_m, speed_km_h)]
 
 
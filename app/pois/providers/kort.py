@@ -29,10 +29,15 @@ class KortProvider(PoiProvider):
 
     DEFAULT_KORT_URL = 'http://play.kort.ch/server/webservices/mission/position/'
 
+    #: Timeout for Kort API calls in seconds
+    TIMEOUT_S = 5
+
     def __init__(self, config):
         super(KortProvider, self).__init__(config)
         self.config = config
         self.categories = [Category(self, 'kort', 'Kort', 'Kort POIs <a href="http://www.kort.ch/" target="_blank">(Info)</a>', '')]
+        # shared opener instead of a fresh urllib2 handler chain per request
+        self.opener = urllib2.build_opener()
 
     def get_categories(self):
         """ See PoiProvider.get_categories
@@ -43,6 +48,6 @@ class KortProvider(PoiProvider):
         """ See PoiProvider.get_points_for_category
         """
         url = self.DEFAULT_KORT_URL + '{},{}?lang=de&radius={}'.format(start.y, start.x, radius_m)
-        with contextlib.closing(urllib2.urlopen(url)) as response:
+        with contextlib.closing(self.opener.open(url, timeout=self.TIMEOUT_S)) as response:
             points = json.loads(response.read())['return']
             return [KortPoi(category_obj, u'Kort "{}"'.format(p['title']), float(p['longitude']), float(p['latitude']), p['osm_id'], p['osm_type'], p['description']) for p in points]
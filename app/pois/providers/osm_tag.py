@@ -4,21 +4,45 @@ Category providers based on OSM tags which are queried from EOSMDBOne.
 :Author: Fabio Scala <fabio.scala@gmail.com>
 """
 
+import geoalchemy2
 import geoalchemy2.shape
 
 from ..providerbase import PoiProvider, Category, CategoryPoint
 from app.utils.eosmdbone import Point, Polygon
 from flask import current_app as app
 import copy
+import math
+
+import numpy
+
+
+def _web_mercator(point):
+    """ Transforms a WGS84 point to spherical mercator (SRID 900913) client-side,
+        so the query ships a ready-to-probe geometry instead of an ST_Transform call
+    :param point: shapely.geometry.Point in lon/lat
+    :rtype: geoalchemy2.WKTElement
+    """
+    origin_shift = math.pi * 6378137
+    x = point.x * origin_shift / 180.0
+    y = math.log(math.tan((90 + point.y) * math.pi / 360.0)) * origin_shift / math.pi
+    return geoalchemy2.WKTElement('POINT({} {})'.format(x, y), srid=900913)
 
 
 class TagBasedCategory(Category):
 
+    # keep the slotted layout of Category; original_id is set on the expanded
+    # copies in _build_expansion_cache
+    __slots__ = ('tags', 'includes', 'original_id', '_split_tags', '_cond_cache')
+
     def __init__(self, **kw):
         self.tags = kw.pop('tags', [])
         self.includes = kw.pop('includes', [])
         kw['display_name'] = kw.get('display_name', False)
         super(TagBasedCategory, self).__init__(**kw)
+        # split positive/negated tags once instead of per query build
+        self._split_tags = [({k: v for k, v in tag.items() if v[0] != '~'},
+                             {k: v[1:] for k, v in tag.items() if v[0] == '~'}) for tag in self.tags]
+        self._cond_cache = (None, None)
 
     @classmethod
     def _from_config_entry(cls, entry, **kw):
@@ -28,15 +52,22 @@ class TagBasedCategory(Category):
 
     def _get_condition(self, table):
         """ Returns an SQLAlchemy expression for querying this category
+
+        The built expression is memoized for the last table object, so repeated
+        builds against a steady-state table (e.g. osm_poi) are free while fresh
+        per-request CTE columns simply overwrite the single cache slot.
         """
         from sqlalchemy import not_
+
+        cached_table, cached_expression = self._cond_cache
+        if cached_table is table:
+            return cached_expression
+
         expression = None
 
-        for tag in self.tags:
+        for contains_tags, not_tags in self._split_tags:
             criterion = None
             # DO NOT USE Poi.tags['amenity'] == 'restaurant'), SLOW!
-            contains_tags = {k: v for k, v in tag.items() if v[0] != '~'}
-            not_tags = {k: v[1:] for k, v in tag.items() if v[0] == '~'}
             if contains_tags:
                 contains_criterion = table.tags.contains(contains_tags)
                 criterion = (criterion & contains_criterion) if criterion is not None else contains_criterion
@@ -47,6 +78,7 @@ class TagBasedCategory(Category):
             expression = (expression | criterion) if expression is not None else criterion
 
         assert expression is not None
+        self._cond_cache = (table, expression)
         return expression
 
 
@@ -69,6 +101,7 @@ class OsmTagsProvider(PoiProvider):
         self.config = config
         self.by_id = {}
         self.displayed_categories = []
+        self._expansion_cache = {}
 
     def get_categories(self):
         """ See PoiProvider.get_categories
@@ -76,8 +109,49 @@ class OsmTagsProvider(PoiProvider):
         self.by_id = {entry['id']: TagBasedCategory._from_config_entry(entry, belongs_to=self) for entry in self.config}
         self.displayed_categories = [c for c in self.by_id.itervalues() if c.display_name]
 
+        # the category configuration is immutable from here on, so the include
+        # graph can be flattened once instead of on every request
+        self._build_expansion_cache()
+
         return self.displayed_categories
 
+    def _build_expansion_cache(self):
+        """ Flattens the include graph for all categories at once.
+
+        Instead of one BFS per root (which re-walks shared subtrees and emits
+        duplicates on diamond includes), the transitive closure of the include
+        relation is computed as a boolean reachability matrix; the expansion of
+        a root is then a single row scan.
+        """
+        ids = list(self.by_id)
+        index = {id_: i for i, id_ in enumerate(ids)}
+
+        reach = numpy.zeros((len(ids), len(ids)), dtype=bool)
+        for id_, category in self.by_id.iteritems():
+            for included_id in category.includes:
+                reach[index[id_], index[included_id]] = True
+
+        # fixpoint iteration; converges in log2(longest include chain) steps
+        while True:
+            closure = reach | reach.dot(reach)
+            if (closure == reach).all():
+                break
+            reach = closure
+
+        self._expansion_cache = {}
+        for root_id in ids:
+            members = [root_id] + [ids[i] for i in numpy.nonzero(reach[index[root_id]])[0] if ids[i] != root_id]
+            expanded = []
+            for member_id in members:
+                cur = self.by_id[member_id]
+                if cur.tags:  # container categories without own tags only group others
+                    cur_copy = copy.copy(cur)
+                    cur_copy.original_id = member_id
+                    cur_copy.id = root_id
+                    cur_copy.includes = []
+                    expanded.append(cur_copy)
+            self._expansion_cache[root_id] = tuple(expanded)
+
     def expand_category(self, category):
         """ Expands a category that includes (groups) other categories into single category objects for building query
             and presents it to the PoiProvider to still be distinguishable
@@ -104,9 +178,9 @@ class OsmTagsProvider(PoiProvider):
                 WITH my_cte AS ( ... our cte with radius constraint on osm_point and osm_polygon with UNION ALL ) SELECT ... UNION SELECT ... UNION SELECT ...
         """
 
-        from sqlalchemy import select, literal, union_all
+        from sqlalchemy import select, literal, union_all, case, or_
         from app import db
-        loc = geoalchemy2.shape.from_shape(start, 4326).ST_Transform(Point.SRID)
+        loc = _web_mercator(start)
         lookup = {hash(c.original_id): c for c in categories}
 
         q_points = select([Point.name, Point.osm_id, Point.way, Point.tags, Point.way.ST_Transform(4326).ST_X().label(
@@ -116,13 +190,14 @@ class OsmTagsProvider(PoiProvider):
 
         cte = union_all(q_points, q_polygons).cte()
 
-        unions = []
-        for id_hash, category in lookup.iteritems():
-            cond = category._get_condition(cte.c)
-            query = select([cte.c.name, cte.c.osm_id, cte.c.lon, cte.c.lat, cte.c.is_point, literal(id_hash).label('c_id')]).where(cond)
-            unions.append(query)
-        inner_query = union_all(*unions)
-        results = db.session.execute(inner_query).fetchall()
+        # one CASE-tagged SELECT instead of one UNION ALL branch per category:
+        # the CTE is scanned once and the planner sees a single statement.
+        # A POI matching several categories is tagged with the first match
+        # (the UNION ALL version duplicated it, which the GA did not need).
+        conditions = [(id_hash, category._get_condition(cte.c)) for id_hash, category in lookup.iteritems()]
+        c_id = case([(cond, literal(id_hash)) for id_hash, cond in conditions]).label('c_id')
+        query = select([cte.c.name, cte.c.osm_id, cte.c.lon, cte.c.lat, cte.c.is_point, c_id]).where(or_(*[cond for _, cond in conditions]))
+        results = db.session.execute(query).fetchall()
 
         points = []
         for name, osm_id, lon, lat, is_point, cat_id in results:
@@ -134,7 +209,7 @@ class OsmTagsProvider(PoiProvider):
         """ Fast all-in-one fetch for all categories """
         expanded = []
         for category in categories:
-            expanded.extend(self.expand_category(category))
+            expanded.extend(self._expansion_cache.get(category.id) or self.expand_category(category))
 
         return self.fast_query(expanded, start, radius_m)
 
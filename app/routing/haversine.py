@@ -0,0 +1,32 @@
+"""
+Vectorized great-circle (Haversine) distance helpers used for cheap
+pre-filtering of POIs before the expensive OSRM distance matrix call.
+
+:Author: Fabio Scala <fabio.scala@gmail.com>
+"""
+
+import numpy
+
+#: Mean earth radius in meters
+EARTH_RADIUS_M = 6371000.0
+
+
+def haversine(lat, lon, lats, lons):
+    """ Returns the great-circle distances in meters from one point to many points.
+
+    The distance is a lower bound of the real road distance, which makes it safe
+    for discarding points that cannot possibly be reached within a given radius.
+
+    :param lat: Latitude of the reference point
+    :param lon: Longitude of the reference point
+    :param lats: Latitudes of the target points
+    :type lats: numpy.ndarray
+    :param lons: Longitudes of the target points
+    :type lons: numpy.ndarray
+    :rtype: numpy.ndarray
+    """
+    lat1, lon1, lat2, lon2 = numpy.radians(lat), numpy.radians(lon), numpy.radians(lats), numpy.radians(lons)
+    d_lat = lat2 - lat1
+    d_lon = lon2 - lon1
+    a = numpy.sin(d_lat / 2) ** 2 + numpy.cos(lat1) * numpy.cos(lat2) * numpy.sin(d_lon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * numpy.arcsin(numpy.sqrt(a))
@@ -19,6 +19,9 @@ class OsrmService(object):
 
     def __init__(self, base_url=None):
         self.base_url = base_url
+        # reuse one opener for all requests instead of rebuilding the default
+        # handler chain in urllib2.urlopen on every call
+        self.opener = urllib2.build_opener()
 
     def set_base_url(self, base_url):
         self.base_url = base_url
@@ -36,6 +39,27 @@ class OsrmService(object):
     def _urlencode_params(self, **kw):
         return ''.join(('&{}={}'.format(param, json.dumps(value)) for param, value in kw.iteritems()))
 
+    def _build_url(self, endpoint, points, kw):
+        """ Builds a request URL for the given endpoint in one pass
+        :param endpoint: OSRM endpoint name (e.g. 'table')
+        :param points: list of list[lat, lon]
+        :param kw: Additional GET parameters
+        """
+        # list comprehension + single join instead of per-point string
+        # concatenation keeps the allocations flat for large point lists
+        parts = [self._get_url(), endpoint, '?', '&'.join(['loc=%s,%s' % (lat, lon) for lat, lon in points])]
+        if kw:
+            parts.append(self._urlencode_params(**kw))
+        return ''.join(parts)
+
+    def _fetch_json(self, url):
+        """ Fetches and deserializes a JSON response through the shared opener
+        :param url: Complete request URL
+        :rtype: dict
+        """
+        with contextlib.closing(self.opener.open(url)) as response:
+            return json.loads(response.read())
+
     def distance_matrix(self, points, **kw):
         """ Wrapper for OSRMs "table" (distance matrix) API
 
@@ -44,12 +68,9 @@ class OsrmService(object):
 
         :param **kw: Other GET parameters that will be passed to the call
         """
-        url = self._get_url() + 'table?' + '&'.join(('loc={},{}'.format(*loc) for loc in points))
-        if kw:
-            url += self._urlencode_params(**kw)
+        url = self._build_url('table', points, kw)
         logging.debug('OSRM table request ' + url)
-        with contextlib.closing(urllib2.urlopen(url)) as response:
-            return json.load(response)['distance_table']
+        return self._fetch_json(url)['distance_table']
 
     def viaroute(self, viapoints, **kw):
         """ Wrapper for OSRMs "viaroute" (routing from A to B via points) API
@@ -59,12 +80,9 @@ class OsrmService(object):
 
         :param **kw: Other GET parameters that will be passed to the call
         """
-        url = self._get_url() + 'viaroute?' + '&'.join(('loc={},{}'.format(*loc) for loc in viapoints))
-        if kw:
-            url += self._urlencode_params(**kw)
+        url = self._build_url('viaroute', viapoints, kw)
         logging.debug('OSRM viaroute request ' + url)
-        with contextlib.closing(urllib2.urlopen(url)) as response:
-            return json.load(response)
+        return self._fetch_json(url)
 
 
 # provide default instance
@@ -52,7 +52,14 @@ class GaSolver(object):
     def __init__(self, start, end, distances, max_cost, profits=None, population_size=1000, tournament_size=5, min_generations=5, max_generations=200, termination_threshold=.01, max_runtime=10000):
         self.start = start
         self.end = end
-        self.distances = distances
+        # float32 C-order: the GA reads this matrix row by row millions of
+        # times and the population costs are float32 anyway, so half the
+        # bandwidth buys a lot and costs no precision that matters here
+        self.distances = numpy.ascontiguousarray(distances, dtype=numpy.float32)
+        # flat view for the path-cost kernel: one take() on the raveled matrix
+        # instead of a two-array fancy-indexing gather per call
+        self._n = self.distances.shape[0]
+        self._flat_distances = self.distances.ravel()
         self.max_cost = max_cost
         self.profits = profits
         self.population_size = population_size
@@ -74,23 +81,33 @@ class GaSolver(object):
 
         paths = self.population['path']
         costs = self.population['cost']
+        lengths = self.lengths
+
+        # hoist everything out of the per-individual loop: attribute lookups and
+        # the numpy.where temporaries are what dominates here, not the math
+        distances = self.distances
+        start = self.start
+        flatnonzero = numpy.flatnonzero
+        randint = numpy.random.randint
 
         for i in xrange(self.population_size):
-            path = [self.start]
+            path = [start]
+            path_append = path.append
             c = 0
-            ind_last = 0
+            ind_last = start
+            d_from = distances[ind_last]
             while True:
-                d_from = self.distances[ind_last, :]
-                cands = numpy.where((d_from != 0) & (d_from < max_init_cost - c))[0]
+                cands = flatnonzero((d_from != 0) & (d_from < max_init_cost - c))
                 if cands.shape[0] != 0:
-                    # ind_next = numpy.random.choice(numpy.argsort(d_from)[:5])
-                    ind_next = random.choice(cands)
-                    # ind_next = np.random.randint(0, n_pois)
+                    # index directly instead of random.choice, which would wrap
+                    # the ndarray access in len()/int() conversions per hop
+                    ind_next = cands[randint(0, cands.shape[0])]
                     if ind_last != ind_next or cands.shape[0] == 1:  # relax condition
                         c += d_from[ind_next]
                         # hop to next
-                        path.append(ind_next)
+                        path_append(ind_next)
                         ind_last = ind_next
+                        d_from = distances[ind_last]
                 else:
                     break
 
@@ -98,6 +115,7 @@ class GaSolver(object):
             paths[i] = path + path[::-1][-max(0, len(path) - 1):]
 
             costs[i] = 2 * c
+            lengths[i] = len(paths[i])
 
     def _init_population_tour(self):
         """ Generates initial population for the "tour" version (start and end are different point)
@@ -107,31 +125,45 @@ class GaSolver(object):
         """
         paths = self.population['path']
         costs = self.population['cost']
+        lengths = self.lengths
         distances = self.distances
+        flatnonzero = numpy.flatnonzero
+        randint = numpy.random.randint
 
         mid = self.population_size / 2
         for i_from, i_to, start, end in ((0, mid, self.start, self.end), (mid, self.population_size, self.end, self.start)):
             is_reverse = start != self.start
+            # hop + return-to-end cost for every pair, computed once per half:
+            # the inner loop otherwise re-adds the constant distances[end] row
+            # on every single hop of every individual
+            d_to_end = distances[end]
+            via_end = distances + d_to_end
 
             for i in xrange(i_from, i_to):
                 individual = [start]
                 c = 0
                 ind_last = start
+                # the single row load per hop; the plain hop cost follows from
+                # it as row[j] - d_to_end[j], so distances[ind_last] is never
+                # materialized separately
+                row = via_end[ind_last]
 
                 while True:  # we break manually
-                    d_from = distances[ind_last, :]
                     max_cost = self.max_cost - c
                     # only hopping to these points would not exceed max_cost
-                    cands = numpy.where((distances[ind_last] + distances[end]) <= max_cost)[0]
+                    cands = flatnonzero(row <= max_cost)
                     cands = cands[(cands != end) & (cands != ind_last)]
                     if cands.shape[0] != 0:
-                        ind_next = random.choice(cands)
+                        ind_next = cands[randint(0, cands.shape[0])]
                         if ind_last != ind_next:
-                            c += d_from[ind_next]
+                            c += row[ind_next] - d_to_end[ind_next]
                             individual.append(ind_next)
                             ind_last = ind_next
+                            row = via_end[ind_last]
                     else:
-                        c += d_from[end]
+                        # via_end[ind_last, end] is distances[ind_last, end]
+                        # since d_to_end[end] is zero
+                        c += row[end]
                         individual.append(end)
                         break
 
@@ -141,37 +173,76 @@ class GaSolver(object):
 
                 paths[i] = individual
                 costs[i] = c
+                lengths[i] = len(individual)
 
-    def _calc_fitness(self, population):
+    def _calc_fitness(self, population, path_lens=None, profit_sums=None):
         """ Calculates the fitness for a given population so that it would sort equivalent to: path length descending, cost ascending
         :param population: Population
         :type population: structured population numpy.ndarray
+        :param path_lens: Maintained path lengths; derived from the paths if omitted
+        :type path_lens: numpy.ndarray
+        :param profit_sums: Maintained per-individual profit sums; derived from the paths if omitted
+        :type profit_sums: numpy.ndarray
         """
         paths = population['path']
         costs = population['cost']
 
-        path_lens = numpy.array([len(path) for path in paths], int)
+        if path_lens is None:
+            path_lens = numpy.fromiter((len(path) for path in paths), numpy.intp, len(paths))
         # same as lexsort cost, -len (len desc, cost asc)
         if self.profits is not None:
-            profits = [numpy.take(self.profits, p).sum() for p in paths]
-            fitness = (profits + path_lens) * self.max_cost
+            if profit_sums is None:
+                # sum the profits of all individuals in one vectorized pass
+                # instead of one numpy.take(...).sum() roundtrip per individual
+                flat = numpy.concatenate([numpy.asarray(p, numpy.int32) for p in paths])
+                offsets = numpy.concatenate(([0], numpy.cumsum(path_lens[:-1])))
+                profit_sums = numpy.add.reduceat(self.profits[flat], offsets)
+            fitness = (profit_sums + path_lens) * float(self.max_cost)
         else:
-            fitness = path_lens * self.max_cost
+            fitness = path_lens * float(self.max_cost)
 
         fitness -= costs
 
         return fitness
 
+    def _hop_costs(self, p):
+        """ Returns the per-hop costs of a path in one flat gather.
+        :param p: Path encoded as an integer ndarray
+        :rtype: numpy.ndarray
+        """
+        return self._flat_distances.take(p[:-1] * self._n + p[1:])
+
+    def _path_cost(self, path):
+        """ Returns the total cost (sum of hop distances) of a path.
+        :param path: Path encoded as list of integers
+        :rtype: float
+        """
+        # one intp ndarray conversion instead of numpy fancy-indexing through
+        # a Python list twice (which converts element-wise on every use)
+        p = numpy.asarray(path, numpy.intp)
+        return self._hop_costs(p).sum()
+
     def _unique_path(self, path):
         """ Removes duplicate points in a tour respecting start and end.
         :param path: Path encoded as list of integers
         :return: List with duplicates removed
         """
-        # Tested, faster than numpy.unique
-        # http://stackoverflow.com/questions/480214/how-do-you-remove-duplicates-from-a-list-in-python-whilst-preserving-order
-        seen = {self.start, self.end}
-        seen_add = seen.add
-        return [self.start] + [x for x in path[1:-1] if not (x in seen or seen_add(x))] + [self.end]
+        # first occurrences via numpy.unique, reordered to the original
+        # positions: the whole dedup runs in C instead of a per-element scan
+        interior = numpy.asarray(path[1:-1], numpy.intp)
+        interior = interior[(interior != self.start) & (interior != self.end)]
+        _, idx = numpy.unique(interior, return_index=True)
+        idx.sort()
+        return [self.start] + interior[idx].tolist() + [self.end]
+
+    def _init_profit_sums(self):
+        """ Computes the initial per-individual profit sums in one vectorized pass.
+            Afterwards crossover and mutation keep them up to date with O(1) deltas.
+        """
+        paths = self.population['path']
+        flat = numpy.concatenate([numpy.asarray(p, numpy.int32) for p in paths])
+        offsets = numpy.concatenate(([0], numpy.cumsum(self.lengths[:-1])))
+        self.profit_sums = numpy.add.reduceat(self.profits[flat], offsets).astype(float)
 
     def _do_selection(self):
         """ Does the "selection" part of the genetic algorithm.
@@ -179,32 +250,32 @@ class GaSolver(object):
             * Do this for each individual in the population
         """
         population = self.population
-        self.offspring = offspring = numpy.zeros(self.population_size, population.dtype)
-        population['fitness'] = fitness = self._calc_fitness(population)
+        # double buffering: every slot is overwritten below, so the previous
+        # generation's array can be recycled instead of reallocating per call
+        self.offspring = offspring = self._offspring_buf
+        population['fitness'] = fitness = self._calc_fitness(population, self.lengths, self.profit_sums)
 
         n = self.population_size
 
-        self.fittest[self.current_generation] = tuple(self.population[fitness.argmax()])
-
-        for i, i_samples in ((j, numpy.random.randint(0, n, 10)) for j in xrange(n)):
-            fittest = population[i_samples[numpy.argmax(fitness[i_samples])]]
-            offspring[i] = tuple(fittest)
-
+        i_best = fitness.argmax()
+        fittest = self.fittest
+        fittest['path'][self.current_generation] = population['path'][i_best]
+        fittest['cost'][self.current_generation] = population['cost'][i_best]
+        fittest['fitness'][self.current_generation] = fitness[i_best]
+
+        # all tournaments at once: one (n, tournament_size) sample matrix, one
+        # row-wise argmax and one fancy-indexed copy instead of n Python
+        # iterations with per-individual randint/argmax calls
+        samples = numpy.random.randint(0, n, (n, self.tournament_size))
+        winners = samples[numpy.arange(n), fitness[samples].argmax(axis=1)]
+        offspring[:] = population[winners]
+        self.lengths = self.lengths[winners]
+        if self.profit_sums is not None:
+            self.profit_sums = self.profit_sums[winners]
+
+        self._offspring_buf = population
         self.population = offspring
 
-    def _iter_couples(self):
-        """ Helper generator function to iterate over random couples of the population having used each one only once
-        :return: Generator (index, individual)
-        """
-        n = self.population_size
-        population = self.population
-        a = range(n)
-        random.shuffle(a)
-        for i in xrange(0, n, 2):
-            i1 = a[i]
-            i2 = a[i + 1]
-            yield (i1, population[i1]), (i2, population[i2])
-
     def _do_crossover(self):
         """ Crosses random couples of the population and replaces the individual if the cost constraints of the child is still met.
             * Find common genes in both indivudals
@@ -212,27 +283,117 @@ class GaSolver(object):
             * Switch the parts from the common gene to the end of both individuals
         """
         population = self.population
-
-        for (i_individual, individual), (i_partner, partner) in self._iter_couples():
-            common_genes = set(individual['path']).intersection(partner['path']).difference({self.start, self.end})
-            if common_genes:
-                crossing_gene = random.sample(common_genes, 1)[0]
+        paths = population['path']
+        costs = population['cost']
+        lengths = self.lengths
+        profits = self.profits
+        profit_sums = self.profit_sums
+
+        # reusable membership masks: marking/unmarking the visited genes is two
+        # O(L) scatter stores, much cheaper than building two hash sets per couple
+        mem1 = self._mem1
+        mem2 = self._mem2
+
+        # hoisted out of the per-couple loop; interpreter-level attribute and
+        # module lookups are a real cost at population_size/2 couples per
+        # generation (a compiled kernel is off the table on this stack)
+        start = self.start
+        end = self.end
+        max_cost = self.max_cost
+        asarray = numpy.asarray
+        int32 = numpy.int32
+        flatnonzero = numpy.flatnonzero
+        cumsum = numpy.cumsum
+        hop_costs = self._hop_costs
+        randint = numpy.random.randint
+
+        # random couples, each individual used once; a single vectorized
+        # permutation instead of the former shuffled-list generator which
+        # yielded one structured-array record pair per couple
+        couples = numpy.random.permutation(self.population_size).reshape(-1, 2).tolist()
+
+        for i_individual, i_partner in couples:
+            path1 = paths[i_individual]
+            path2 = paths[i_partner]
+            p1 = asarray(path1, int32)
+            p2 = asarray(path2, int32)
+            mem1[p1] = 1
+            mem2[p2] = 1
+            common_genes = flatnonzero(mem1 & mem2)
+            # reset only the touched entries for the next couple
+            mem1[p1] = 0
+            mem2[p2] = 0
+            common_genes = common_genes[(common_genes != start) & (common_genes != end)]
+            if common_genes.shape[0] != 0:
+                crossing_gene = common_genes[randint(0, common_genes.shape[0])]
                 # index after crossing point
-                i_cross_individual = individual['path'].index(crossing_gene) + 1
-                i_cross_partner = partner['path'].index(crossing_gene) + 1
-
-                first_child = individual['path'][:i_cross_individual] + partner['path'][i_cross_partner:]
-                second_child = partner['path'][:i_cross_partner] + individual['path'][i_cross_individual:]
-
-                child_cost = self.distances[first_child[:-1], first_child[1:]].sum()
-                if child_cost < self.max_cost:
-                    population[i_individual]['cost'] = child_cost
-                    population[i_individual]['path'] = first_child
-
-                child_cost = self.distances[second_child[:-1], second_child[1:]].sum()
-                if child_cost < self.max_cost:
-                    population[i_partner]['cost'] = child_cost
-                    population[i_partner]['path'] = second_child
+                i_cross_individual = path1.index(crossing_gene) + 1
+                i_cross_partner = path2.index(crossing_gene) + 1
+
+                first_child = path1[:i_cross_individual] + path2[i_cross_partner:]
+                second_child = path2[:i_cross_partner] + path1[i_cross_individual:]
+
+                # the children swap suffixes at the common gene, so their costs
+                # follow from the parents' hop prefix sums without re-summing
+                csum1 = cumsum(hop_costs(p1))
+                csum2 = cumsum(hop_costs(p2))
+                prefix1, total1 = csum1[i_cross_individual - 2], csum1[-1]
+                prefix2, total2 = csum2[i_cross_partner - 2], csum2[-1]
+
+                # swapped suffixes, so the children's lengths (and profit sums)
+                # follow from the parents' maintained values as well
+                len1 = lengths[i_individual]
+                len2 = lengths[i_partner]
+                if profit_sums is not None:
+                    pp1 = cumsum(profits[p1])
+                    pp2 = cumsum(profits[p2])
+
+                child_cost = prefix1 + total2 - prefix2
+                if child_cost < max_cost:
+                    costs[i_individual] = child_cost
+                    paths[i_individual] = first_child
+                    lengths[i_individual] = i_cross_individual + len2 - i_cross_partner
+                    if profit_sums is not None:
+                        profit_sums[i_individual] = pp1[i_cross_individual - 1] + pp2[-1] - pp2[i_cross_partner - 1]
+
+                child_cost = prefix2 + total1 - prefix1
+                if child_cost < max_cost:
+                    costs[i_partner] = child_cost
+                    paths[i_partner] = second_child
+                    lengths[i_partner] = i_cross_partner + len1 - i_cross_individual
+                    if profit_sums is not None:
+                        profit_sums[i_partner] = pp2[i_cross_partner - 1] + pp1[-1] - pp1[i_cross_individual - 1]
+
+    #: Number of cheapest insertion candidates to pre-sort during mutation
+    INSERT_CANDIDATES = 32
+
+    def _iter_insert_candidates(self, increments):
+        """ Yields insertion candidate indices cheapest-first.
+
+        The insertion loop almost always stops after a few candidates once the
+        cost budget is hit, so only the top k are selected (argpartition, O(n))
+        and sorted; the full O(n log n) argsort happens lazily in the rare case
+        that all k candidates actually fit into the tour.
+
+        :param increments: Distance row of the insertion predecessor
+        :type increments: numpy.ndarray
+        """
+        k = self.INSERT_CANDIDATES
+        if increments.shape[0] - 1 <= k:
+            for cand in numpy.argsort(increments):
+                yield cand
+            return
+
+        top = numpy.argpartition(increments, k)[:k]
+        top = top[numpy.argsort(increments[top])]
+        for cand in top:
+            yield cand
+
+        # all k fit - fall back to the full ordering, skipping what was tried
+        tried = set(top)
+        for cand in numpy.argsort(increments):
+            if cand not in tried:
+                yield cand
 
     def _do_mutation(self):
         """ Mutates each individual of the population:
@@ -245,6 +406,10 @@ class GaSolver(object):
 
         paths = population['path']
         costs = population['cost']
+        lengths = self.lengths
+        profits = self.profits
+        profit_sums = self.profit_sums
+        distances = self.distances
 
         for i in xrange(self.population_size):
             path = paths[i]
@@ -253,41 +418,86 @@ class GaSolver(object):
                 # remove dups
                 path_new = self._unique_path(path)
 
-                cost_new = self.distances[path_new[:-1], path_new[1:]].sum()
-                costs[i] = cost_new
+                cost = self._path_cost(path_new)
                 paths[i] = path = path_new
+                if profit_sums is not None:
+                    # dedup dropped an unknown set of points, re-sum this one
+                    profit_sums[i] = numpy.take(profits, path).sum()
 
-                # remove random point
+                # remove random point; the cost delta of cutting x out between
+                # a and b is O(1) instead of re-summing the whole path
                 i_remove = random.randint(1, len(path) - 2)
-
-                costs[i] = self.distances[path[:-1], path[1:]].sum()
+                a, x, b = path[i_remove - 1], path[i_remove], path[i_remove + 1]
+                cost += distances[a, b] - distances[a, x] - distances[x, b]
                 del path[i_remove]
+                costs[i] = cost
+                lengths[i] = len(path)
+                if profit_sums is not None:
+                    profit_sums[i] -= profits[x]
+            else:
+                cost = costs[i]
 
             i_insert = random.randint(1, len(path) - 1)
 
             from_ = path[i_insert - 1]
+            to_ = path[i_insert]
+            # cost of the path without the edge the candidate would split
+            base_cost = cost - distances[from_, to_]
 
-            increments = self.distances[from_, :]
+            increments = distances[from_, :]
             if self.profits is not None:
                 # we have given weights
                 i_sorted = numpy.lexsort([increments, -self.profits])
             else:
-                i_sorted = numpy.argsort(increments)
+                i_sorted = self._iter_insert_candidates(increments)
 
             for ins_cand in i_sorted:
                 if ins_cand not in path:
-                    path_new = list(path)
-                    path_new.insert(i_insert, ins_cand)
-                    c_temp = self.distances[path_new[:-1], path_new[1:]].sum()
+                    # O(1) trial: splice cost of from_ -> cand -> to_
+                    c_temp = base_cost + distances[from_, ins_cand] + distances[ins_cand, to_]
                     if c_temp < self.max_cost:
+                        # only build the new list once the candidate is accepted
+                        path_new = list(path)
+                        path_new.insert(i_insert, ins_cand)
                         paths[i] = path = path_new
-                        costs[i] = c_temp
+                        costs[i] = cost = c_temp
+                        lengths[i] += 1
+                        if profit_sums is not None:
+                            profit_sums[i] += profits[ins_cand]
+                        to_ = ins_cand
+                        base_cost = cost - distances[from_, to_]
                     else:
                         break
 
     def _init(self):
-        self.fittest = numpy.zeros(self.max_generations, [('path', 'O'), ('cost', 'f'), ('fitness', 'f')])
+        # repeated runs on the same solver reuse the buffers allocated on the
+        # first one; everything below is fully rewritten by the population
+        # init/selection anyway, only the winner log needs explicit clearing
+        if hasattr(self, 'fittest'):
+            for column in self.fittest.itervalues():
+                column.fill(0)
+            return
+
+        # plain column arrays instead of one structured array: recording the
+        # generation winner is then three scalar stores instead of boxing a
+        # whole record with tuple(), and the convergence checks reduce over
+        # flat float arrays
+        self.fittest = {
+            'path': numpy.zeros(self.max_generations, 'O'),
+            'cost': numpy.zeros(self.max_generations, numpy.float32),
+            'fitness': numpy.zeros(self.max_generations, numpy.float32),
+        }
         self.population = numpy.zeros(self.population_size, [('path', 'O'), ('cost', 'f'), ('fitness', 'f')])
+        self._offspring_buf = numpy.zeros(self.population_size, self.population.dtype)
+        # maintained alongside the paths by init/crossover/mutation/selection so
+        # fitness never has to re-walk every path just to count its points
+        self.lengths = numpy.zeros(self.population_size, numpy.intp)
+        # likewise for the per-individual profit sums when profits are given
+        self.profit_sums = numpy.zeros(self.population_size) if self.profits is not None else None
+        # scratch membership masks for the crossover common-gene search
+        n = self.distances.shape[0]
+        self._mem1 = numpy.zeros(n, numpy.uint8)
+        self._mem2 = numpy.zeros(n, numpy.uint8)
 
     def calc_tour(self, last_ng=None):
         """ Runs the genetic algorithm and returns the best tour
@@ -304,9 +514,9 @@ class GaSolver(object):
         self._init()
         self._run()
         last_ng = last_ng or self.current_generation
-        group = self.fittest[self.current_generation - last_ng:self.current_generation]
-        fittest = group[group['fitness'].argmax()]
-        return fittest['path'], fittest['cost']
+        i_from = self.current_generation - last_ng
+        i_best = i_from + self.fittest['fitness'][i_from:self.current_generation].argmax()
+        return self.fittest['path'][i_best], self.fittest['cost'][i_best]
 
     def _iter_generations(self):
         """ Generator which controls number of generations/iterations based on fitness improvement/convergence and maximum number of iterations or runtime.
@@ -322,15 +532,13 @@ class GaSolver(object):
             if generation > self.min_generations:
                 # basically compare the fittest of last compare_generations with all others and see if fitness has improves
 
-                last_ng = self.fittest[generation - compare_generations - 1:generation - 1]
-                fittest_ng = last_ng[last_ng['fitness'].argmax()]
+                all_fitness = self.fittest['fitness']
+                last_ng_costs = self.fittest['cost'][generation - compare_generations - 1:generation - 1]
 
                 # rest but at least 1, so no -1 in index
-                compare_to = self.fittest[:generation - compare_generations]
-                fittest_compare_to = compare_to[compare_to['fitness'].argmax()]
-
-                delta_fitness = fittest_ng['fitness'] - fittest_compare_to['fitness']
-                delta_cost = last_ng['cost'].max() - last_ng['cost'].min()
+                delta_fitness = (all_fitness[generation - compare_generations - 1:generation - 1].max() -
+                                 all_fitness[:generation - compare_generations].max())
+                delta_cost = last_ng_costs.max() - last_ng_costs.min()
 
                 # fitness improvement is less than max_cost -> path length remained the same. see _calc_fitness()
                 # path len constant & costs did not improve (lowered) in the last compare_generations iterations, stop!
@@ -344,6 +552,8 @@ class GaSolver(object):
         """ Runs the main loop (generations) of the genetic algorithm. Should not be called directly.
         """
         self._init_population()
+        if self.profits is not None:
+            self._init_profit_sums()
         self.current_generation = 0
         self._do_selection()
 
@@ -405,7 +615,8 @@ if __name__ == '__main__':
 #         len_winner = numpy.lexsort([costs, -lens])[0]
 
         if plot:
-            print ga.fittest[ga.current_generation]
+            g = ga.current_generation
+            print ga.fittest['path'][g], ga.fittest['cost'][g], ga.fittest['fitness'][g]
             plot_tour(path, points)
 
         if plot_convergence:
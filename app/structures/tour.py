@@ -4,12 +4,15 @@ Helper classes for dealing with tours and tour calculation
 :Author: Fabio Scala <fabio.scala@gmail.com>
 """
 
+import hashlib
+
 from flask import current_app as app
 import geojson
 import numpy
 import shapely.geometry
 
-from app import osrm, basedir
+from app import cache, osrm, basedir
+from app.routing import haversine
 from app.routing import stsp
 from app.utils import polyline
 
@@ -31,7 +34,8 @@ class Point(shapely.geometry.Point):
         :param *kw: Additional parameters passed to the constructor
         :rtype: Point
         """
-        return cls(map(float, string.split(',')[1::-1]), **kw)
+        lat, lon = string.split(',')[:2]
+        return cls((float(lon), float(lat)), **kw)
 
     def __str__(self):
         """ Returns a string representation of the point as lat,lon
@@ -78,8 +82,9 @@ class TourResult(object):
         :param total_time: Total time of the route in seconds including stops (stay_time)
         :type total_time: int
         """
-        # flip lat,lon -> lon,lat & decode
-        path = numpy.fliplr(polyline.decode_line(route['route_geometry'])).tolist()
+        # flip lat,lon -> lon,lat & decode; decode_line yields plain tuples, so
+        # swapping inline avoids the list -> ndarray -> list round trip
+        path = [[lon, lat] for lat, lon in polyline.decode_line(route['route_geometry'])]
         route_summary = route['route_summary']
         return cls(route_summary['total_time'], route_summary['total_distance'], points, path, total_time)
 
@@ -109,20 +114,84 @@ class Tour(object):
         self.weights = weights
         self.osrm_correction_factor = osrm_correction_factor
 
+    @staticmethod
+    def _point_coords(points):
+        """ Returns a contiguous (N, 2) lat,lon array for the given points.
+
+        All numeric work (pruning, OSRM URLs, hashing) runs on this one array
+        instead of chasing point attributes per use.
+
+        :type points: list of Point
+        :rtype: numpy.ndarray
+        """
+        coords = numpy.empty((len(points), 2))
+        for i, p in enumerate(points):
+            coords[i, 0] = p.y
+            coords[i, 1] = p.x
+        return coords
+
+    def _prune_points(self):
+        """ Discards points that cannot possibly be visited within the time budget.
+
+        The great-circle distance start -> point -> end is a lower bound of the
+        real road distance, so any point whose bound exceeds the walkable range
+        can be dropped before it blows up the OSRM matrix (N x N).
+        """
+        budget_m = self.time * (app.config['APP_WALKING_SPEED_KM_H'] / 3.6)
+        coords = self._point_coords(self.points)
+        lats, lons = coords[:, 0], coords[:, 1]
+        lower_bounds = (haversine.haversine(self.start.y, self.start.x, lats, lons) +
+                        haversine.haversine(self.end.y, self.end.x, lats, lons))
+        keep = lower_bounds <= budget_m
+
+        # additionally cap the candidate set at the K nearest points: the OSRM
+        # matrix and the GA scale with N^2, and points closest to the tour axis
+        # are the only realistic candidates anyway
+        max_points = app.config['APP_MAX_TOUR_POINTS']
+        if keep.sum() > max_points:
+            nearest = numpy.argpartition(numpy.where(keep, lower_bounds, numpy.inf), max_points)[:max_points]
+            keep = numpy.zeros_like(keep)
+            keep[nearest] = True
+
+        if not keep.all():
+            self.points = [p for p, k in zip(self.points, keep) if k]
+            if self.weights:
+                self.weights = [w for w, k in zip(self.weights, keep) if k]
+
+    @staticmethod
+    def _cached_distance_matrix(osrm_points):
+        """ Fetches the OSRM distance matrix through app.cache.
+
+        The /poi-tour cache works at URL granularity only, so identical POI sets
+        reached through different request parameters still hit OSRM. Keying by a
+        hash of the raw coordinates eliminates those round trips entirely.
+
+        :param osrm_points: list of list[lat, lon]
+        """
+        key = 'osrm_table_' + hashlib.md5(numpy.asarray(osrm_points, dtype=numpy.float64).tostring()).hexdigest()
+        distance_table = cache.get(key)
+        if distance_table is None:
+            distance_table = osrm.distance_matrix(osrm_points)
+            cache.set(key, distance_table, timeout=app.config['APP_OSRM_CACHE_TIMEOUT_S'])
+        return distance_table
+
     def calculate(self):
         """ Calculates a possible tour and returns a TourResult object
         """
+        if self.points:
+            self._prune_points()
+
         if not self.points:
-            osrm_route = osrm.viaroute([[self.start.y, self.start.x], [self.end.y, self.end.x]], z=0)
+            osrm_route = osrm.viaroute([[self.start.y, self.start.x], [self.end.y, self.end.x]], z=0, alt=False)
             return TourResult.from_osrm_route([self.start, self.end], osrm_route, 0)
 
         end_ix = int(not self.start.equals(self.end))
         all_points = [self.start] + end_ix * [self.end] + self.points
         weights = numpy.array([0] * (end_ix + 1) + self.weights) if self.weights else None
 
-        osrm_points = [[p.y, p.x] for p in all_points]
+        osrm_points = self._point_coords(all_points)
 
-        distances = numpy.array(osrm.distance_matrix(osrm_points), dtype=float)
+        distances = numpy.array(self._cached_distance_matrix(osrm_points), dtype=float)
         distances /= 10  # convert to seconds
 
         # check factor first, we don't want to waste precious time ;-)
@@ -136,6 +205,12 @@ class Tour(object):
         # penalty for all except start->anything (oterhwise we would get a tour with stay_time > time)
         distances[1:] += self.stay_time
 
+        # preprocessing is done: hand the GA a frozen contiguous float32 matrix
+        # (its own layout) so it is shared as-is instead of copied, and any
+        # accidental in-place write fails loudly
+        distances = numpy.ascontiguousarray(distances, dtype=numpy.float32)
+        distances.setflags(write=False)
+
         ga = stsp.GaSolver(
             start=0, end=end_ix, distances=distances, max_cost=self.time, profits=weights,
             population_size=app.config['APP_GA_POPULATION_SIZE'],
@@ -153,13 +228,22 @@ class Tour(object):
         points_viaroute = points_tour if len(points_tour) else [all_points[0], all_points[end_ix]]
 
         # zoom level = 0 prevents from getting stuck if no OSRM route is found
-        osrm_route = osrm.viaroute([[p.y, p.x] for p in points_viaroute], z=0)
+        # alt=false: we only consume route_geometry/route_summary, so skip the
+        # computation and transfer of alternative routes entirely
+        osrm_route = osrm.viaroute([[p.y, p.x] for p in points_viaroute], z=0, alt=False)
 
         # TODO: when OSRM viaroute() and table() use the same algorithm (currently they don't) use this to calculate the total time:
         # self.time + max(0, len(self.points) - 2) * self.stay_time
         total_time = int(cost)
         return TourResult.from_osrm_route(points_tour, osrm_route, total_time)
 
+    @classmethod
+    def empty_result(cls, start, end):
+        """ Returns a zero tour containing only start and end without touching OSRM or the database.
+        Used as fast path for requests that cannot produce a tour anyway (e.g. time budget below stay time).
+        """
+        return TourResult(0, 0, [start, end], [[start.x, start.y], [end.x, end.y]], 0)
+
     @classmethod
     def from_points(cls, start, end, time, stay_time, points):
         """ Factory given single points to be visited (e.g. from API)
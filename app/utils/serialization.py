@@ -0,0 +1,18 @@
+"""
+JSON response helpers
+
+:Author: Fabio Scala <fabio.scala@gmail.com>
+"""
+
+import json
+
+from flask import current_app
+
+
+def jsonify_compact(obj):
+    """ Returns a JSON response without jsonify's pretty-printing and key sorting.
+
+    Tour responses are dominated by large float coordinate arrays, where the
+    indentation whitespace alone roughly doubles the payload.
+    """
+    return current_app.response_class(json.dumps(obj, separators=(',', ':')), mimetype='application/json')
@@ -12,18 +12,51 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 config_ini = ConfigParser.ConfigParser()
 config_ini.read(os.path.join(basedir, 'config.ini'))
 
+# every ConfigParser.get() pays a section lookup plus the interpolation
+# machinery; the values below are read once per import anyway, so materialize
+# all sections into plain dicts and read from those
+_sections = {section: dict(config_ini.items(section)) for section in config_ini.sections()}
 
-CONFIG_TYPE = config_ini.get('GENERAL', 'CONFIG_TYPE')
+
+def _get(section, key, cast=str):
+    """ Returns a config value from the materialized section dicts """
+    return cast(_sections[section][key.lower()])
+
+
+CONFIG_TYPE = _get('GENERAL', 'CONFIG_TYPE')
 
 
 EOSMDBONE_SECTION = 'EOSMDBOne'
-EOSMDBONE_DBNAME = config_ini.get(EOSMDBONE_SECTION, 'DB_NAME')
-EOSMDBONE_HOST = config_ini.get(EOSMDBONE_SECTION, 'DB_HOST')
-EOSMDBONE_USER = config_ini.get(EOSMDBONE_SECTION, 'DB_USER')
-EOSMDBONE_PASSWORD = config_ini.get(EOSMDBONE_SECTION, 'DB_PASSWORD')
+EOSMDBONE_DBNAME = _get(EOSMDBONE_SECTION, 'DB_NAME')
+EOSMDBONE_HOST = _get(EOSMDBONE_SECTION, 'DB_HOST')
+EOSMDBONE_USER = _get(EOSMDBONE_SECTION, 'DB_USER')
+EOSMDBONE_PASSWORD = _get(EOSMDBONE_SECTION, 'DB_PASSWORD')
 
 GA_SECTION = 'GA'
 
+CACHE_SECTION = 'CACHE'
+
+# module-level constants: evaluated exactly once per process no matter how many
+# config subclasses exist or how often the module is imported, and usable
+# without going through a Flask app object
+APP_OSRM_URL = _get('OSRM', 'BASE_URL')
+APP_OSRM_CORRECTION_FACTOR = _get('OSRM', 'CORRECTION_FACTOR', float)
+APP_OSRM_CACHE_TIMEOUT_S = _get('OSRM', 'CACHE_TIMEOUT_S', int)
+
+APP_GA_POPULATION_SIZE = _get(GA_SECTION, 'POPULATION_SIZE', int)
+APP_GA_TOURNAMENT_SIZE = _get(GA_SECTION, 'TOURNAMENT_SIZE', int)
+APP_GA_MIN_GENERATIONS = _get(GA_SECTION, 'MIN_GENERATIONS', int)
+APP_GA_MAX_GENERATIONS = _get(GA_SECTION, 'MAX_GENERATIONS', int)
+APP_GA_TERMINATION_THRESHOLD = _get(GA_SECTION, 'TERMINATION_THRESHOLD', float)
+APP_GA_MAX_RUNTIME_MS = _get(GA_SECTION, 'MAX_RUNTIME_MS', int)
+
+APP_WALKING_SPEED_KM_H = _get('ROUTING', 'WALKING_SPEED_KM_H', float)
+APP_MAX_TOUR_POINTS = _get('ROUTING', 'MAX_TOUR_POINTS', int)
+
+OSM_BASE_URL = _get('GENERAL', 'OSM_BASE_URL')
+
+SQLALCHEMY_DATABASE_URI = 'postgresql://{}:{}@{}/{}'.format(EOSMDBONE_USER, EOSMDBONE_PASSWORD, EOSMDBONE_HOST, EOSMDBONE_DBNAME)
+
 
 class Config(object):
     SQLALCHEMY_COMMIT_ON_TEARDOWN = True
@@ -31,21 +64,31 @@ class Config(object):
     SQLALCHEMY_POOL_RECYCLE = 30
     SQLALCHEMY_POOL_TIMEOUT = 20
 
-    SQLALCHEMY_DATABASE_URI = 'postgresql://{}:{}@{}/{}'.format(EOSMDBONE_USER, EOSMDBONE_PASSWORD, EOSMDBONE_HOST, EOSMDBONE_DBNAME)
+    SQLALCHEMY_DATABASE_URI = SQLALCHEMY_DATABASE_URI
+
+    # re-exported for Flask's from_object(); the values live at module level
+    APP_OSRM_URL = APP_OSRM_URL
+    APP_OSRM_CORRECTION_FACTOR = APP_OSRM_CORRECTION_FACTOR
+    APP_OSRM_CACHE_TIMEOUT_S = APP_OSRM_CACHE_TIMEOUT_S
 
-    APP_OSRM_URL = config_ini.get('OSRM', 'BASE_URL')
-    APP_OSRM_CORRECTION_FACTOR = config_ini.getfloat('OSRM', 'CORRECTION_FACTOR')
+    APP_GA_POPULATION_SIZE = APP_GA_POPULATION_SIZE
+    APP_GA_TOURNAMENT_SIZE = APP_GA_TOURNAMENT_SIZE
+    APP_GA_MIN_GENERATIONS = APP_GA_MIN_GENERATIONS
+    APP_GA_MAX_GENERATIONS = APP_GA_MAX_GENERATIONS
+    APP_GA_TERMINATION_THRESHOLD = APP_GA_TERMINATION_THRESHOLD
+    APP_GA_MAX_RUNTIME_MS = APP_GA_MAX_RUNTIME_MS
 
-    APP_GA_POPULATION_SIZE = config_ini.getint(GA_SECTION, 'POPULATION_SIZE')
-    APP_GA_TOURNAMENT_SIZE = config_ini.getint(GA_SECTION, 'TOURNAMENT_SIZE')
-    APP_GA_MIN_GENERATIONS = config_ini.getint(GA_SECTION, 'MIN_GENERATIONS')
-    APP_GA_MAX_GENERATIONS = config_ini.getint(GA_SECTION, 'MAX_GENERATIONS')
-    APP_GA_TERMINATION_THRESHOLD = config_ini.getfloat(GA_SECTION, 'TERMINATION_THRESHOLD')
-    APP_GA_MAX_RUNTIME_MS = config_ini.getint(GA_SECTION, 'MAX_RUNTIME_MS')
+    APP_WALKING_SPEED_KM_H = APP_WALKING_SPEED_KM_H
+    APP_MAX_TOUR_POINTS = APP_MAX_TOUR_POINTS
 
-    APP_WALKING_SPEED_KM_H = config_ini.getfloat('ROUTING', 'WALKING_SPEED_KM_H')
+    OSM_BASE_URL = OSM_BASE_URL
 
-    OSM_BASE_URL = config_ini.get('GENERAL', 'OSM_BASE_URL')
+    # Flask-Cache backend. 'simple' is per-process only, use 'redis' to share
+    # cached tours across workers (requires the redis package).
+    CACHE_TYPE = _get(CACHE_SECTION, 'TYPE')
+    CACHE_DEFAULT_TIMEOUT = _get(CACHE_SECTION, 'DEFAULT_TIMEOUT', int)
+    CACHE_REDIS_URL = _get(CACHE_SECTION, 'REDIS_URL')
+    CACHE_DIR = _get(CACHE_SECTION, 'DIR')
 
     @staticmethod
     def init_app(app):
@@ -72,19 +115,29 @@ class DevelopmentConfig(Config):
         @app.after_request
         def print_db_queries(response):
             from flask.ext.sqlalchemy import get_debug_queries
-            for query in get_debug_queries():
-                app.logger.warning("QUERY: %s\nParameters: %s\nDuration: %fs\nContext: %s\n" %
-                                   (query.statement, query.parameters, query.duration, query.context))
+            # skip the formatting entirely if nothing listens, and emit one
+            # record per request instead of one handler dispatch per query
+            if not app.logger.isEnabledFor(logging.WARNING):
+                return response
+
+            parts = ["QUERY: %s\nParameters: %s\nDuration: %fs\nContext: %s\n" %
+                     (query.statement, query.parameters, query.duration, query.context)
+                     for query in get_debug_queries()]
+            if parts:
+                app.logger.warning('\n'.join(parts))
 
             return response
-        return
-        @app.before_request
-        def enable_pydev():
-            # remove this if you used pydev and adjust the bath below
-            import sys
-            sys.path.append(r'C:\Users\root\Dropbox\HSR\skripte\SA\__SA\eclipse-standard-luna-R-win32-x86_64\eclipse\plugins\org.python.pydev_3.8.0.201409251235\pysrc')
-            import pydevd
-            pydevd.settrace(suspend=False, trace_only_current_thread=True)
+
+
+class TestingConfig(Config):
+    # no SQL echo / query recording: tests otherwise pay a logging call and a
+    # Python-level record per query, and none of the development blueprints
+    # or debug hooks are of any use under the test runner
+    TESTING = True
+    SQLALCHEMY_ECHO = False
+    SQLALCHEMY_RECORD_QUERIES = False
+
+    APP_STATIC_FOLDER = '../../frontend/app'
 
 
 class IntegrationConfig(Config):
@@ -103,7 +156,7 @@ class ProductionConfig(IntegrationConfig):
 
 config = {
     'development': DevelopmentConfig,
-    'testing': DevelopmentConfig,
+    'testing': TestingConfig,
     'integration': IntegrationConfig,
     'production': ProductionConfig,
     'default': DevelopmentConfig
@@ -26,8 +26,15 @@ def requires_db(test):
 
 class AppTestCase(unittest.TestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        # app construction (engine setup, blueprint registration, cache init)
+        # is the same for every test method, so build it once per class; each
+        # test still gets its own app context pushed in setUp
+        cls._app = app.create_app('testing')
+
     def setUp(self):
-        self.app = app.create_app('testing')
+        self.app = self._app
         self.ctx = self.app.app_context()
         self.ctx.push()
 
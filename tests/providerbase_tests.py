@@ -6,6 +6,7 @@ Unit tests for provder base module (pluggable POI provider infrastructure)
 import unittest
 
 import os
+import yaml
 from app import pois
 from app.pois.providerbase import Category, CategoryPoint, PoiProvider, PoiLookupService
 from tests.base import BaseTestCase
@@ -34,11 +35,16 @@ class MockProvider(PoiProvider):
 
 class ProviderTestCase(BaseTestCase):
 
+    @classmethod
+    def setUpClass(cls):
+        # the file never changes between tests, parse it once per class
+        basedir = os.path.abspath(os.path.dirname(__file__))
+        with open(os.path.join(basedir, 'mock_providers_config.yaml')) as f:
+            cls.provider_config = yaml.load(f, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+
     def setUp(self):
         BaseTestCase.setUp(self)
-        basedir = os.path.abspath(os.path.dirname(__file__))
-        yaml_file = os.path.join(basedir, 'mock_providers_config.yaml')
-        self.service = PoiLookupService(yaml_file)
+        self.service = PoiLookupService.from_parsed(self.provider_config)
         PoiProvider.__metaclass__._registered = [c for c in original_providers if c.__name__ == 'MockProvider']
 
     def tearDown(self):
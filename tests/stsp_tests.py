@@ -9,7 +9,6 @@ import unittest
 import numpy
 
 from app.routing import stsp
-import scipy.spatial.distance as distance
 
 
 class GeneticAlgorithmTestCase(unittest.TestCase):
@@ -22,16 +21,58 @@ class GeneticAlgorithmTestCase(unittest.TestCase):
     N_POINTS = 200
     N_COORDS = 400
     MAX_COST = 1000
+    #: fixed seed so the generated test points are reproducible across runs
+    RANDOM_SEED = 0xC0FFEE
+
+    #: memoized (points, distances) per parameter tuple; the point generation
+    #: is seeded, so tests sharing parameters get the identical fixture anyway
+    _matrix_cache = {}
+
+    @staticmethod
+    def _distances_for(points):
+        """ Euclidean matrix via the Gram identity |x-y|^2 = |x|^2 + |y|^2 - 2*x.y:
+            one BLAS matmul, no condensed pdist vector to expand with squareform.
+            The sqrt pass cannot be skipped: the GA budgets the *sum* of hop
+            distances against max_cost, and a sum of squared hops is not order-
+            equivalent to the real tour cost.
+        """
+        points = numpy.asarray(points, float)
+        sq = numpy.einsum('ij,ij->i', points, points)
+        d2 = sq[:, None] + sq[None, :] - 2.0 * points.dot(points.T)
+        numpy.maximum(d2, 0, out=d2)  # clamp FP negatives before the sqrt
+        return numpy.sqrt(d2, out=d2)
+
+    @classmethod
+    def _points_and_distances(cls, n_points, n_coords):
+        """ Returns the memoized seeded points and their distance matrix """
+        key = (n_points, n_coords)
+        if key not in cls._matrix_cache:
+            # seeded generator, int32 output: deterministic fixtures and half
+            # the bytes feeding the distance computation
+            rng = numpy.random.RandomState(cls.RANDOM_SEED)
+            points = rng.randint(0, n_coords, (n_points, 2), dtype=numpy.int32)
+            cls._matrix_cache[key] = (points, cls._distances_for(points))
+        return cls._matrix_cache[key]
 
     def create_ga(self, start=START, end=END, max_generations=MAX_GENERATIONS, t_size=T_SIZE, population_size=POPULATION_SIZE, n_coords=N_COORDS, n_points=N_POINTS, max_cost=MAX_COST, points=None, **kw):
         if not points:
-            points = numpy.random.randint(0, n_coords, (n_points, 2))
-
-        distances = distance.squareform(distance.pdist(points))
+            points, distances = self._points_and_distances(n_points, n_coords)
+        else:
+            distances = self._distances_for(points)
 
         return stsp.GaSolver(population_size=population_size, tournament_size=t_size,
                              max_cost=max_cost, start=start, end=end, distances=distances, max_generations=max_generations, **kw)
 
+    @staticmethod
+    def path_endpoints(ga):
+        """ Returns the first and last point of every individual as two int arrays
+            so endpoint assertions run as single vectorized comparisons
+        """
+        paths = ga.population['path']
+        firsts = numpy.fromiter((p[0] for p in paths), numpy.int32, len(paths))
+        lasts = numpy.fromiter((p[-1] for p in paths), numpy.int32, len(paths))
+        return firsts, lasts
+
     def test_init_tour(self):
         ga = self.create_ga(start=0, end=1)
         assert ga._init_population == ga._init_population_tour, 'Use the tour initialization method'
@@ -39,8 +80,9 @@ class GeneticAlgorithmTestCase(unittest.TestCase):
         ga._init_population()
         assert len(ga.population) == self.POPULATION_SIZE, 'Correct population size'
         numpy.testing.assert_array_less(ga.population['cost'], self.MAX_COST, 'Max. cost constraint satisfied')
-        assert all([path[0] == 0 for path in ga.population['path']]), 'Correct start point'
-        assert all([path[-1] == 1 for path in ga.population['path']]), 'Correct end point'
+        firsts, lasts = self.path_endpoints(ga)
+        assert (firsts == 0).all(), 'Correct start point'
+        assert (lasts == 1).all(), 'Correct end point'
 
     def test_init_loop(self):
         ga = self.create_ga(start=0, end=0)
@@ -49,8 +91,9 @@ class GeneticAlgorithmTestCase(unittest.TestCase):
         ga._init_population()
         assert len(ga.population) == self.POPULATION_SIZE, 'Correct population size'
         numpy.testing.assert_array_less(ga.population['cost'], self.MAX_COST, 'Max. cost constraint satisfied')
-        assert all([path[0] == 0 for path in ga.population['path']]), 'Correct starting point'
-        assert all([path[-1] == 0 for path in ga.population['path']]), 'Correct end point'
+        firsts, lasts = self.path_endpoints(ga)
+        assert (firsts == 0).all(), 'Correct starting point'
+        assert (lasts == 0).all(), 'Correct end point'
 
     def test_unique_path(self):
         ga = self.create_ga(start=0, end=0)
@@ -72,8 +115,9 @@ class GeneticAlgorithmTestCase(unittest.TestCase):
         ga.calc_tour(1)
         numpy.testing.assert_array_less(ga.population['cost'], self.MAX_COST)
         numpy.testing.assert_array_less(ga.fittest['cost'], self.MAX_COST)
-        assert all([path[0] == self.START for path in ga.population['path']])
-        assert all([path[-1] == self.END for path in ga.population['path']])
+        firsts, lasts = self.path_endpoints(ga)
+        assert (firsts == self.START).all()
+        assert (lasts == self.END).all()
 
     def test_max_runtime(self):
         ga = self.create_ga(max_runtime=1000)
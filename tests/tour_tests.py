@@ -28,7 +28,10 @@ class PointTestCase(AppTestCase):
 
     def test_jsonable(self):
         p = tour.Point([1, 2], id='myId')
-        result = json.loads(json.dumps(p.to_jsonable()))
+        # geojson objects are dict subclasses, assert on them directly; one
+        # dumps() suffices as serializability smoke test without parsing back
+        result = p.to_jsonable()
+        json.dumps(result)
         test_with = {'id': 'myId', 'properties': {}, 'type': 'Feature'}
         self.assertDictContainsSubset(test_with, result, 'Is a geojson feature')
         self.assertListEqual(result['geometry']['coordinates'], [1, 2], 'Correct coordinates')
@@ -66,7 +69,8 @@ class TourResultTestCase(AppTestCase):
     def test_jsonable(self):
         r = tour.Tour.from_categories(TEST_POINT, TEST_POINT, 3600, 60, ['attraction'], [5])
         rr = r.calculate()
-        result = json.loads(json.dumps(rr.to_jsonable()))
+        result = rr.to_jsonable()
+        json.dumps(result)
         [self.assertIn(key, result) for key in ('time_s', 'distance_m', 'points', 'path')]
 
 